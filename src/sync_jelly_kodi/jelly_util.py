@@ -1,21 +1,46 @@
 import logging
 import re
-from turtle import position
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
 import requests
+from cachetools import cached, LRUCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional
 from urllib.parse import urljoin
 import json
 import os
 from .sqlite_util import (
     upsert_jelly_items, get_watched_jelly_items,
-    find_jelly_items_by_file, get_all_jelly_item_ids,
+    find_jelly_items_by_file,
     delete_stale_jelly_items,
 )
-from .utils import convert_windows_to_unix_path, load_dotenvs
+from .settings import get_settings
+from .utils import (
+    compile_mount_pattern, convert_windows_to_unix_path, dry_run_enabled, json_loads, load_dotenvs,
+)
 
 
 logger = logging.getLogger(__name__)
 
+# Items requested per /Users/{id}/Items page during jelly_pull.
+ITEMS_PAGE_SIZE = 1000
+
+# Item keys kept from /Items responses; everything else (ImageTags, ProviderIds,
+# etc.) is dropped before it reaches the DB. Name/ProductionYear/Type feed the
+# renamer and archiver, Path feeds unified_root/unified_file.
+ITEM_KEEP = frozenset({
+    "Id", "Name", "Type", "Path", "ProductionYear", "UserData",
+    "SeriesName", "SeasonName", "IndexNumber", "ParentIndexNumber",
+})
+
+# Jellyfin positions are in 100ns ticks.
+TICKS_PER_SECOND = 10_000_000
+
+
+def _max_workers() -> int:
+    """Number of concurrent Jellyfin requests used for per-user fan-out."""
+    return get_settings().jellyfin_max_workers
 
 
 class JellySession(object):
@@ -24,6 +49,14 @@ class JellySession(object):
         headers = {"X-Emby-Token": api_key}
         self.session = requests.Session()
         self.session.headers.update(headers)
+        # Size the keep-alive pool for the concurrent fan-out (requests defaults to 10)
+        # and retry idempotent requests on transient gateway errors.
+        pool_size = max(10, _max_workers())
+        self.session.mount(jellyfin_url, HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+        ))
         self.session.get(jellyfin_url)  # Initial request to establish session
         self.jellyfin_url = jellyfin_url
         self.api_key = api_key
@@ -41,6 +74,24 @@ class JellySession(object):
         return self.session.delete(url, **kwargs)
 
 
+@cached(LRUCache(maxsize=1))
+def _connect_jelly(jellyfin_url: str, api_key: str) -> JellySession:
+    return JellySession(jellyfin_url, api_key)
+
+
+def get_jelly_session() -> JellySession:
+    """Return a shared JellySession for JELLYFIN_URL / JELLYFIN_API_KEY.
+
+    The session (and its pooled connections) is reused across calls and only
+    rebuilt if the URL or key changes.
+    """
+    jellyfin_url = os.getenv("JELLYFIN_URL")
+    api_key = os.getenv("JELLYFIN_API_KEY")
+    if not jellyfin_url or not api_key:
+        raise ValueError("JELLYFIN_URL and JELLYFIN_API_KEY must be set in environment variables.")
+    return _connect_jelly(jellyfin_url, api_key)
+
+
 def seconds_to_ticks(seconds: float) -> int:
     """
     Converts seconds to ticks (10,000 ticks per millisecond).
@@ -51,7 +102,7 @@ def seconds_to_ticks(seconds: float) -> int:
     Returns:
         int: The equivalent time in ticks.
     """
-    return int(seconds * 10_000_000)
+    return int(seconds * TICKS_PER_SECOND)
 
 def ticks_to_seconds(ticks: int) -> float:
     """
@@ -63,7 +114,7 @@ def ticks_to_seconds(ticks: int) -> float:
     Returns:
         float: The equivalent time in seconds.
     """
-    return ticks / 10_000_000
+    return ticks / TICKS_PER_SECOND
 
 
 def update_playback_position(
@@ -126,7 +177,8 @@ def update_playback_position(
             logger.debug(
                 f"Successfully updated playback status for Item {item_id} to {position_ticks} ticks."
             )
-            logger.debug(json.dumps(response.json(), indent=2))
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(json.dumps(json_loads(response.content), indent=2))
             return True
         else:
             logger.debug(
@@ -134,9 +186,9 @@ def update_playback_position(
             )
             # Try to print error details if available
             try:
-                logger.debug("Response content:", response.json())
-            except json.JSONDecodeError:
-                logger.debug("Response content (text):", response.text)
+                logger.debug("Response content: %s", json_loads(response.content))
+            except ValueError:  # json.JSONDecodeError / orjson.JSONDecodeError
+                logger.debug("Response content (text): %s", response.text)
             return False
 
     except requests.exceptions.RequestException as e:
@@ -170,11 +222,7 @@ def jelly_library_refresh(library_name: str) -> tuple[bool, str]:
 
     Returns (success, message).
     """
-    jellyfin_url = os.getenv("JELLYFIN_URL")
-    api_key = os.getenv("JELLYFIN_API_KEY")
-    if not jellyfin_url or not api_key:
-        raise ValueError("JELLYFIN_URL and JELLYFIN_API_KEY must be set in environment variables.")
-    session = JellySession(jellyfin_url, api_key)
+    session = get_jelly_session()
 
     item_id = _get_virtual_folder_item_id(session, library_name)
     if item_id:
@@ -209,12 +257,8 @@ def mark_library_played(library_name: str) -> tuple[bool, str]:
 
     Returns (success, message).
     """
-    dry_run = os.getenv("DRY_RUN", "false") == "true"
-    jellyfin_url = os.getenv("JELLYFIN_URL")
-    api_key = os.getenv("JELLYFIN_API_KEY")
-    if not jellyfin_url or not api_key:
-        raise ValueError("JELLYFIN_URL and JELLYFIN_API_KEY must be set in environment variables.")
-    session = JellySession(jellyfin_url, api_key)
+    dry_run = dry_run_enabled()
+    session = get_jelly_session()
 
     item_id = _get_virtual_folder_item_id(session, library_name)
     if not item_id:
@@ -222,6 +266,7 @@ def mark_library_played(library_name: str) -> tuple[bool, str]:
 
     users = get_users(session)
     marked = considered = 0
+    to_mark: list[tuple[dict, dict]] = []
     for user in users:
         user_id = user["Id"]
         resp = session.get(
@@ -246,7 +291,16 @@ def mark_library_played(library_name: str) -> tuple[bool, str]:
                             movie.get("Name"), user["Name"])
                 marked += 1
                 continue
-            if update_playback_position(session, user_id, movie["Id"], 0, play_count=1):
+            to_mark.append((user, movie))
+
+    # Each write is an independent POST; overlap them instead of paying one RTT apiece.
+    def _mark(pair: tuple[dict, dict]) -> bool:
+        user, movie = pair
+        return update_playback_position(session, user["Id"], movie["Id"], 0, play_count=1)
+
+    with ThreadPoolExecutor(max_workers=_max_workers()) as pool:
+        for (user, movie), ok in zip(to_mark, pool.map(_mark, to_mark)):
+            if ok:
                 marked += 1
             else:
                 logger.warning("Failed to mark '%s' played for user '%s'",
@@ -278,17 +332,17 @@ def mark_file_unwatched_jellyfin(unified_file: str) -> tuple[bool, str]:
     Uses the local jellyitems cache (no additional Jellyfin pull needed). Returns
     (True, message) if at least one user was cleared, (False, reason) otherwise.
     """
-    jellyfin_url = os.getenv("JELLYFIN_URL")
-    api_key = os.getenv("JELLYFIN_API_KEY")
-    if not jellyfin_url or not api_key:
-        return False, "JELLYFIN_URL and JELLYFIN_API_KEY must be set in environment variables."
-    session = JellySession(jellyfin_url, api_key)
+    try:
+        session = get_jelly_session()
+    except ValueError as e:
+        return False, str(e)
 
     items = find_jelly_items_by_file(unified_file)
     if not items:
         return False, f"No Jellyfin items found in DB for '{unified_file}'"
 
     cleared = failed = 0
+    to_clear: list[tuple[str, str, str]] = []
     for item in items:
         user_id = item.get("UserId") or item.get("user_id")
         item_id = item.get("Id") or item.get("id")
@@ -297,12 +351,18 @@ def mark_file_unwatched_jellyfin(unified_file: str) -> tuple[bool, str]:
             logger.warning("mark_file_unwatched_jellyfin: missing UserId/Id for item in DB")
             failed += 1
             continue
-        if mark_item_unplayed(session, user_id, item_id):
-            logger.info("mark_file_unwatched_jellyfin: cleared '%s' for user '%s'", unified_file, user_name)
-            cleared += 1
-        else:
-            logger.warning("mark_file_unwatched_jellyfin: failed for user '%s'", user_name)
-            failed += 1
+        to_clear.append((user_id, item_id, user_name))
+
+    # One independent POST per user; overlap them like mark_library_played.
+    with ThreadPoolExecutor(max_workers=_max_workers()) as pool:
+        results = pool.map(lambda entry: mark_item_unplayed(session, entry[0], entry[1]), to_clear)
+        for (_, _, user_name), ok in zip(to_clear, results):
+            if ok:
+                logger.info("mark_file_unwatched_jellyfin: cleared '%s' for user '%s'", unified_file, user_name)
+                cleared += 1
+            else:
+                logger.warning("mark_file_unwatched_jellyfin: failed for user '%s'", user_name)
+                failed += 1
 
     if failed and not cleared:
         return False, f"Failed to clear watched state for all {failed} user item(s)"
@@ -312,81 +372,134 @@ def mark_file_unwatched_jellyfin(unified_file: str) -> tuple[bool, str]:
     return True, msg
 
 
+def _iter_user_items(session: JellySession, user: dict):
+    """Yield every movie and episode in one user's library, including UserData and Path.
+
+    Items are requested ``ITEMS_PAGE_SIZE`` at a time so no single response (and its
+    decoded JSON) has to hold the whole recursive library at once. If the library
+    changes mid-pull the pages can shift and skip items; that raises RuntimeError
+    rather than letting the pull delete the skipped items as stale.
+    """
+    items_url = f"/Users/{user['Id']}/Items"
+    # Only movies and episodes are matched against Kodi; skip images/folders and
+    # trim each item to ITEM_KEEP to cut both response size and stored JSON.
+    params = {"Recursive": "true", "Fields": "UserData,Path", "SortBy": "SortName",
+              "EnableImages": "false", "EnableUserData": "true",
+              "IncludeItemTypes": "Movie,Episode", "Limit": ITEMS_PAGE_SIZE}
+    start = 0
+    total = 0
+    while True:
+        items_resp = session.get(items_url, params={**params, "StartIndex": start})
+        items_resp.raise_for_status()
+        page = json_loads(items_resp.content)
+        items = page.get("Items", [])
+        total = page.get("TotalRecordCount", 0)
+        for item in items:
+            yield {key: value for key, value in item.items() if key in ITEM_KEEP}
+        start += len(items)
+        if not items or start >= total:
+            break
+    if start != total:
+        raise RuntimeError(f"Jellyfin returned {start} of {total} items for user '{user['Name']}'; "
+                           "library changed during the pull")
+
+
+def _fetch_user_items(session: JellySession, user: dict) -> list[dict]:
+    """Fetch every item in one user's library, including UserData and Path."""
+    return list(_iter_user_items(session, user))
+
+
 def jelly_pull()->bool:
     """
     Fetch all watch status of all items from Jellyfin server and save into database
     """
-    jellyfin_url = os.getenv("JELLYFIN_URL")
-    api_key = os.getenv("JELLYFIN_API_KEY")
-    if not jellyfin_url or not api_key:
-        raise ValueError("JELLYFIN_URL and JELLYFIN_API_KEY must be set in environment variables.")
-    session = JellySession(jellyfin_url, api_key)
+    session = get_jelly_session()
 
     # Get user id if not provided
     users = get_users(session)
-    all_users_items = []
-    jellyfin_item_ids = set()
-    for user in users:
-        logger.debug(f"Processing user ID: {user['Name']}:{user['Id']}")
-        user_id = user["Id"]
-        # Get all items for the user
-        items_url = f"/Users/{user_id}/Items"
-        params = {"Recursive": "true", "Fields": "UserData,Path"}
-        items_resp = session.get(items_url, params=params)
-        items_resp.raise_for_status()
-        items = items_resp.json().get("Items", [])
-        for item in items:
-            logger.debug(f"Processing item: {item['Name']}:{item['Id']}")
-            item["UserId"] = user_id
-            item["UserName"] = user["Name"]
-            # A unique identifier for a user's item is the combination of UserId and the item's Id
-            if item.get("Path"):
-                item["unified_root"], item["unified_file"] = get_root_file_path(item["Path"])
-
-            jellyfin_item_ids.add(f"{user_id}_{item['Id']}")
-
-        all_users_items.extend(items)
-    sync_db(all_users_items, jellyfin_item_ids)
+    sync = JellySyncSession()
+    # One recursive /Items request per user; run them concurrently so the pull
+    # costs roughly one server round-trip instead of one per user. Each user's
+    # items are written as soon as they arrive and then dropped. A new fetch is
+    # only started once a finished one has been consumed, so at most
+    # JELLYFIN_MAX_WORKERS users' libraries are held in memory at a time.
+    max_workers = _max_workers()
+    pending_users = iter(users)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_fetch_user_items, session, user): user
+                   for user in islice(pending_users, max_workers)}
+        # Resolve the mount pattern once for the whole pull, not per item.
+        jelly_path_pat = compile_mount_pattern(get_settings().jelly_mount_pat)
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                user = futures.pop(future)
+                items = future.result()
+                logger.debug("Processing user ID: %s:%s", user['Name'], user['Id'])
+                user_id = user["Id"]
+                for item in items:
+                    item["UserId"] = user_id
+                    item["UserName"] = user["Name"]
+                    if item.get("Path"):
+                        item["unified_root"], item["unified_file"] = get_root_file_path(item["Path"], jelly_path_pat)
+                sync.upsert(items)
+                del items
+                for user in islice(pending_users, 1):
+                    futures[pool.submit(_fetch_user_items, session, user)] = user
+    sync.close()
     return True
-def get_root_file_path(path:str)->tuple:
+def get_root_file_path(path:str, jelly_path_pat:Optional[re.Pattern]=None)->tuple:
     """
     Get the path parsed as RIP, <folder>/<file>
     or TRANSCODED, <file>
     or EPISODIC, <folder>/<season>/<file>
     key is the three root folders
 
+    Bulk callers pass the compiled JELLY_MOUNT_PAT so it isn't looked up per item.
     """
     # jellyfin is running on windows with <nas>/movies/ mounted at M: with RIP|TRANSCODED|EPISODIC under it
-    jelly_path_pat = re.compile(os.getenv("JELLY_MOUNT_PAT",""))
+    if jelly_path_pat is None:
+        jelly_path_pat = compile_mount_pattern(get_settings().jelly_mount_pat)
     jelly_match = jelly_path_pat.match(path)
     if not jelly_match:
         logger.error(f"Match not found for: {path}")
         return None,None
-    if len(jelly_match.groups()) == 3:
-        unified_root = jelly_match.groups()[1]
-        unified_file = convert_windows_to_unix_path(jelly_match.groups()[2])
-        return unified_root, unified_file
+    jelly_groups = jelly_match.groups()
+    if len(jelly_groups) == 3:
+        _, unified_root, rest = jelly_groups
+        return unified_root, convert_windows_to_unix_path(rest)
     else:
-        logger.error(f"Incorrect matches found for: {path}: {jelly_match.groups()}")
+        logger.error(f"Incorrect matches found for: {path}: {jelly_groups}")
         return None, None 
    
 
 
-def sync_db(all_users_items: list[dict], jellyfin_item_ids: set[str]):
-    """
-    Synchronizes the fetched Jellyfin items with SQLite database.
-    It upserts new/updated items and deletes stale items.
-    """
-    # 1. Upsert all items from Jellyfin into SQLite
-    matched_count = inserted_count = modified_count = 0
-    if all_users_items:
-        matched_count, inserted_count, modified_count = upsert_jelly_items(all_users_items)
-        logger.debug(f"Upserted items. Matched: {matched_count}, Inserted: {inserted_count}, Modified: {modified_count}")
+class JellySyncSession(object):
+    """Write a Jellyfin pull into SQLite in chunks, then drop stale rows on close().
 
-    # 2. Delete items from SQLite that are no longer in Jellyfin
-    current_ids = [(item["Id"], item["UserId"]) for item in all_users_items]
-    deleted_count = delete_stale_jelly_items(current_ids)
-    logger.debug(f"Deleted {deleted_count} stale items from Jellyfin DB.")
+    ``upsert`` can be called once per user (or any chunk) as items arrive; ``close``
+    deletes every row whose (Id, UserId) wasn't seen during the session.
+    """
+    def __init__(self):
+        # A unique identifier for a user's item is the combination of the item's Id and UserId
+        self.current_ids: set[tuple[str, str]] = set()
+        self.matched = self.inserted = self.modified = 0
+
+    def upsert(self, items: list[dict]):
+        if not items:
+            return
+        matched, inserted, modified = upsert_jelly_items(items)
+        self.matched += matched
+        self.inserted += inserted
+        self.modified += modified
+        self.current_ids.update((item["Id"], item["UserId"]) for item in items)
+
+    def close(self) -> int:
+        logger.debug(f"Upserted items. Matched: {self.matched}, Inserted: {self.inserted}, Modified: {self.modified}")
+        deleted_count = delete_stale_jelly_items(self.current_ids)
+        logger.debug(f"Deleted {deleted_count} stale items from Jellyfin DB.")
+        self.current_ids = set()
+        return deleted_count
 
 
 def get_users(session) -> list[dict]:
@@ -413,11 +526,18 @@ def get_watched_items_from_db():
     result = get_watched_jelly_items(JELLYFIN_SYNC_USER)
     return result
 
-def sync_watch_status_from_kodi_to_jelly(kodi_item: dict, jelly_item: dict, session: JellySession):
+def sync_watch_status_from_kodi_to_jelly(kodi_item: dict, jelly_item: dict,
+                                         dry_run: Optional[bool] = None) -> tuple | None:
     """
-    Using the Jellyfin API, set the playcount and resume position in Jellyfin based on a Kodi item.
+    Work out the Jellyfin write that brings jelly_item's playcount/resume in line with kodi_item.
+
+    Returns the ``(user_id, item_id, position_ticks, play_count)`` update to make, or None
+    when the item is already in sync or DRY_RUN is enabled. Callers collect these and send
+    them with ``flush_jelly_writes``; loop callers pass ``dry_run`` so DRY_RUN is read once
+    rather than per item.
     """
-    dry_run = os.getenv("DRY_RUN", "false") == "true"
+    if dry_run is None:
+        dry_run = dry_run_enabled()
 
     # Extract watch status from the Kodi item
     kodi_playcount = kodi_item.get("playcount", 0)
@@ -433,28 +553,42 @@ def sync_watch_status_from_kodi_to_jelly(kodi_item: dict, jelly_item: dict, sess
     # Convert Kodi seconds to Jellyfin ticks
     new_position_ticks = seconds_to_ticks(kodi_resume_seconds)
 
-    # Check if an update is necessary to avoid redundant API calls
-    position_diff_seconds = abs(kodi_resume_seconds - ticks_to_seconds(jelly_resume_ticks))
-    if kodi_playcount <= jelly_playcount and position_diff_seconds < 2 and jelly_is_played == (kodi_playcount > 0 and kodi_resume_seconds == 0):
+    # Check if an update is necessary to avoid redundant API calls. Compare in ticks,
+    # reusing the converted Kodi position rather than converting Jellyfin's back.
+    position_diff_ticks = abs(new_position_ticks - jelly_resume_ticks)
+    if kodi_playcount <= jelly_playcount and position_diff_ticks < 2 * TICKS_PER_SECOND and jelly_is_played == (kodi_playcount > 0 and kodi_resume_seconds == 0):
         # if kodi_playcount should be less than or equal to jelly_playcount
         # position diff should be less than 2 seconds.
         # jelly is played flag should match : if playcount > 0 AND resume_seconds == 0. Otherwise it is in progress - so played should be false.
-        logger.debug(f"Watch status for '{jelly_item.get('Name')}' is already in sync. Skipping.")
-        return
-
-    logger.debug(f"Syncing to Jellyfin '{jelly_item.get('Name')}': playcount={kodi_playcount}, resume_ticks={new_position_ticks}")
-
-    if not dry_run:
-        update_playback_position(
-            session=session,
-            user_id=jelly_item["UserId"],
-            item_id=jelly_item["Id"],
-            position_ticks=new_position_ticks,
-            play_count=kodi_playcount,
-        )
-    else:
-        logger.info(f"Dry-Run enabled: setting watch status for '{jelly_item.get('Name')}'.")
+        logger.debug("Watch status for '%s' is already in sync. Skipping.", jelly_item.get('Name'))
+        return None
+
+    logger.debug("Syncing to Jellyfin '%s': playcount=%s, resume_ticks=%s",
+                 jelly_item.get('Name'), kodi_playcount, new_position_ticks)
+
+    if dry_run:
+        logger.info("Dry-Run enabled: setting watch status for '%s'.", jelly_item.get('Name'))
+        return None
+    return (jelly_item["UserId"], jelly_item["Id"], new_position_ticks, kodi_playcount)
+
+
+def flush_jelly_writes(session: JellySession, batch: list[tuple]) -> int:
+    """Send pending UserData updates to Jellyfin and clear ``batch``.
+
+    Jellyfin has no batch UserData endpoint, so the POSTs are overlapped on a
+    JELLYFIN_MAX_WORKERS thread pool. Returns the number of successful updates.
+    """
+    if not batch:
+        return 0
+
+    def _update(update: tuple) -> bool:
+        user_id, item_id, position_ticks, play_count = update
+        return update_playback_position(session, user_id, item_id, position_ticks, play_count=play_count)
 
+    with ThreadPoolExecutor(max_workers=_max_workers()) as pool:
+        ok_count = sum(1 for ok in pool.map(_update, batch) if ok)
+    batch.clear()
+    return ok_count
 
 
 if __name__ == "__main__":
@@ -1,28 +1,35 @@
-import re
+from concurrent.futures import ThreadPoolExecutor
 from kodipydent import Kodi
 import logging
-import os
+import re
+import requests
 from . import jelly_util
 from .sqlite_util import (
     upsert_kodi_items, get_watched_kodi_items,
-    find_kodi_items_by_file, get_all_kodi_item_ids,
+    find_kodi_items_by_file,
     delete_stale_kodi_items
 )
 from . import utils
+from .settings import get_settings
 from pathlib import Path
+from typing import Optional
 from cachetools import cached, LRUCache
 
 logger = logging.getLogger(__name__)
 
+# Seconds to wait on one batched JSON-RPC POST before giving up on that chunk.
+KODI_RPC_TIMEOUT = 60
+
 
 @cached(LRUCache(maxsize=1))
+def _connect_kodi(host: str, port: int, username: str, password: str) -> Kodi: # type: ignore
+    logger.info(f"Connecting to {host} on port: {port}")
+    # Kodi() introspects the JSON-RPC API on construction, so build it once per target.
+    return Kodi(host, port=port, username=username, password=password)
+
 def getKodi() -> Kodi: # type: ignore
-    KODIHOST = os.getenv("KODIHOST", "localhost")
-    KODIPORT = int(os.getenv("KODIPORT", "8080"))
-    KODIUSER = os.getenv("KODIUSER", "kodi")
-    KODIPASS = os.getenv("KODIPASS", "1234")
-    logger.info(f"Connecting to {KODIHOST} on port: {KODIPORT}")
-    mk = Kodi(KODIHOST, port=KODIPORT, username=KODIUSER, password=KODIPASS)
+    settings = get_settings()
+    mk = _connect_kodi(settings.kodi_host, settings.kodi_port, settings.kodi_user, settings.kodi_pass)
     # with open("kodi_rpc.txt", "w") as f:
         # f.write(str(mk))
     return mk
@@ -43,8 +50,9 @@ def kodi_fetch_all_movies():
     movies = mk.VideoLibrary.GetMovies(properties=
        ["file","title","year","playcount","imdbnumber","resume"])
     if movies and movies.get('result', {}).get('movies'):
+        kodi_path_pat = utils.compile_mount_pattern(get_settings().kodi_mount_pat)
         for movie in movies["result"]["movies"]:
-            movie["unified_root"], movie["unified_file"] = get_root_file_path(movie["file"])
+            movie["unified_root"], movie["unified_file"] = get_root_file_path(movie["file"], kodi_path_pat)
             movie["uniqueid"] = movie['movieid']
     return movies['result']['movies']
 
@@ -54,6 +62,84 @@ def kodi_movie_details(movie_id:str):
        ["file","title","year","playcount","imdbnumber","resume"])
     return movie_detail
 
+def _max_workers() -> int:
+    """Number of concurrent Kodi JSON-RPC requests used when fetching episodes."""
+    return get_settings().kodi_max_workers
+
+def kodi_rpc_batch_size() -> int:
+    """Number of JSON-RPC calls packed into one batched POST to /jsonrpc."""
+    return get_settings().kodi_rpc_batch
+
+@cached(LRUCache(maxsize=1))
+def _kodi_http_session(username: str, password: str) -> requests.Session:
+    """A keep-alive session for raw JSON-RPC batch POSTs (kodipydent has no batch API)."""
+    session = requests.Session()
+    session.auth = (username, password)
+    return session
+
+def _kodi_rpc_url() -> str:
+    settings = get_settings()
+    return f"http://{settings.kodi_host}:{settings.kodi_port}/jsonrpc"
+
+def _post_batch(calls: list[dict]) -> list[dict]:
+    settings = get_settings()
+    session = _kodi_http_session(settings.kodi_user, settings.kodi_pass)
+    response = session.post(_kodi_rpc_url(), json=calls, timeout=KODI_RPC_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+def kodi_rpc_batch(calls: list[tuple[str, dict]], raise_on_error: bool = True) -> list:
+    """Run many ``(method, params)`` JSON-RPC calls as batched POSTs.
+
+    Calls are sent ``KODI_RPC_BATCH`` per HTTP request, with those requests issued
+    concurrently. Returns each call's ``result`` in input order.
+
+    A failed call (an error entry, a malformed reply, a failed or timed-out POST, or
+    no answer at all) raises RuntimeError by default, so a pull never mistakes a
+    failed fetch for "no items" and goes on to delete them as stale. With ``raise_on_error=False`` (the write
+    path) failures are logged and returned as ``None``.
+    """
+    payload = [{"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+                 for i, (method, params) in enumerate(calls)]
+    size = kodi_rpc_batch_size()
+    chunks = [payload[i:i + size] for i in range(0, len(payload), size)]
+    results: list = [None] * len(calls)
+    answered = [False] * len(calls)
+    errors: list[str] = []
+    with ThreadPoolExecutor(max_workers=_max_workers()) as pool:
+        futures = [pool.submit(_post_batch, chunk) for chunk in chunks]
+        for chunk, future in zip(chunks, futures):
+            try:
+                responses = future.result()
+            except (requests.RequestException, ValueError) as e:
+                # HTTP error, connection failure/timeout, or a non-JSON body: this
+                # chunk's calls stay unanswered, the other chunks are still used.
+                errors.append(f"Kodi JSON-RPC batch of {len(chunk)} call(s) failed: {e}")
+                continue
+            if not isinstance(responses, list):
+                # Kodi answers a batch it can't process with a single error object.
+                errors.append(f"Kodi JSON-RPC batch of {len(chunk)} call(s) failed: {responses}")
+                continue
+            for response in responses:
+                call_id = response.get("id") if isinstance(response, dict) else None
+                if not isinstance(call_id, int) or not 0 <= call_id < len(calls):
+                    errors.append(f"Kodi JSON-RPC returned an unmatched response: {response}")
+                    continue
+                answered[call_id] = True
+                if "error" in response:
+                    call = calls[call_id]
+                    errors.append(f"Kodi JSON-RPC {call[0]}({call[1]}) failed: {response['error']}")
+                    continue
+                results[call_id] = response.get("result")
+    unanswered = answered.count(False)
+    if unanswered:
+        errors.append(f"Kodi JSON-RPC left {unanswered} of {len(calls)} call(s) unanswered")
+    for error in errors:
+        logger.error(error)
+    if errors and raise_on_error:
+        raise RuntimeError(errors[0])
+    return results
+
 def kodi_fetch_all_tv_shows():
     mk = getKodi()
     # First, get all TV shows to retrieve their IDs
@@ -63,55 +149,65 @@ def kodi_fetch_all_tv_shows():
     if tv_shows_result and tv_shows_result.get('result', {}).get('tvshows'):
         tv_shows = tv_shows_result['result']['tvshows']
         logger.info(f"Found {len(tv_shows)} TV shows. Fetching episodes for each.")
-        
-        for show in tv_shows:
-            tvshowid = show['tvshowid']
-            seasons_query = mk.VideoLibrary.GetSeasons(tvshowid=tvshowid, properties=["season"])
-            seasons = seasons_query['result']['seasons']
-            
-            # For each show, get all its episodes with detailed properties
-            for season in seasons:
-                episodes_result = mk.VideoLibrary.GetEpisodes(
-                    tvshowid=tvshowid, season=season['season'], 
-                    properties=["playcount", "resume", "file", "title", "season", "episode"]
-                )
-                
-                if episodes_result and episodes_result.get('result', {}).get('episodes'):
-                    episodes = episodes_result['result']['episodes']
-                    logger.debug(f"Found {len(episodes)} episodes for '{show['title']}'.")
-                    for episode in episodes:
-                        episode["unified_root"], episode["unified_file"] = get_root_file_path(episode["file"])
-                        episode["uniqueid"] = episode['episodeid']
-                        episode["tvshowid"] = show["tvshowid"]
-                        episode["tvshowtitle"] = show["title"]
-                        episode["tvshowyear"] = show["year"]
-                    all_episodes.extend(episodes)
+
+        # Coalesce the per-show GetSeasons and per-season GetEpisodes calls into
+        # JSON-RPC batches instead of one HTTP round-trip per call.
+        show_seasons = kodi_rpc_batch([
+            ("VideoLibrary.GetSeasons", {"tvshowid": show['tvshowid'], "properties": ["season"]})
+            for show in tv_shows
+        ])
+        pairs = [(show, season['season'])
+                 for show, seasons in zip(tv_shows, show_seasons)
+                 for season in (seasons or {}).get('seasons', [])]
+        season_episodes = kodi_rpc_batch([
+            ("VideoLibrary.GetEpisodes", {
+                "tvshowid": show['tvshowid'], "season": season,
+                "properties": ["playcount", "resume", "file", "title", "season", "episode"],
+            })
+            for show, season in pairs
+        ])
+
+        kodi_path_pat = utils.compile_mount_pattern(get_settings().kodi_mount_pat)
+        for (show, _season), episodes_result in zip(pairs, season_episodes):
+            if not episodes_result or not episodes_result.get('episodes'):
+                continue
+            episodes = episodes_result['episodes']
+            logger.debug("Found %d episodes for '%s'.", len(episodes), show['title'])
+            for episode in episodes:
+                episode["unified_root"], episode["unified_file"] = get_root_file_path(episode["file"], kodi_path_pat)
+                episode["uniqueid"] = episode['episodeid']
+                episode["tvshowid"] = show["tvshowid"]
+                episode["tvshowtitle"] = show["title"]
+                episode["tvshowyear"] = show["year"]
+            all_episodes.extend(episodes)
 
     return all_episodes
 
 def kodi_tv_show_details(tv_show_id:str):
     getKodi()
 
-def get_root_file_path(path:str)->tuple:
+def get_root_file_path(path:str, kodi_path_pat:Optional[re.Pattern]=None)->tuple:
     """
     Get the path parsed as RIP, <folder>/<file>
     or TRANSCODED, <file>
     or EPISODIC, <folder>/<season>/<file>
     key is the three root folders
 
+    Bulk callers pass the compiled KODI_MOUNT_PAT so it isn't looked up per item.
     """
     # jellyfin is running on windows with <nas>/movies/ mounted at M: with RIP|TRANSCODED|EPISODIC under it
-    kodi_path_pat = re.compile(os.getenv("KODI_MOUNT_PAT",""))
+    if kodi_path_pat is None:
+        kodi_path_pat = utils.compile_mount_pattern(get_settings().kodi_mount_pat)
     kodi_match = kodi_path_pat.match(path)
     if not kodi_match:
         logger.error(f"Match not found for: {path}")
         return None,None
-    if len(kodi_match.groups()) == 3:
-        unified_root = kodi_match.groups()[1]
-        unified_file = utils.convert_windows_to_unix_path(kodi_match.groups()[2])
-        return unified_root, unified_file
+    kodi_groups = kodi_match.groups()
+    if len(kodi_groups) == 3:
+        _, unified_root, rest = kodi_groups
+        return unified_root, utils.convert_windows_to_unix_path(rest)
     else:
-        logger.error(f"Incorrect matches found for: {path}: {kodi_match.groups()}")
+        logger.error(f"Incorrect matches found for: {path}: {kodi_groups}")
         return None, None 
 
 def kodi_pull():
@@ -142,8 +238,7 @@ def sync_db(all_users_items: list[dict], kodi_item_ids: set[str]):
         print(f"Upserted items. Matched: {matched_count}, Inserted: {inserted_count}, Modified: {modified_count}")
 
     # 2. Delete items from SQLite that are no longer in Kodi
-    current_ids = [item["uniqueid"] for item in all_users_items]
-    deleted_count = delete_stale_kodi_items(current_ids)
+    deleted_count = delete_stale_kodi_items(kodi_item_ids)
     logger.info(f"Deleted {deleted_count} stale items from Kodi DB.")
 
 def get_watched_items_from_db():
@@ -185,23 +280,30 @@ def mark_movie_unwatched_kodi(unified_file: str) -> tuple[bool, str]:
     return True, msg
 
 
-def sync_watch_status_from_jelly_to_kodi(jelly_item:dict, kodi_item:dict):
-    """using kodi api set the playcount and resume.position in kodi based on jellyfin item"""
-    dry_run = os.getenv("DRY_RUN", "false") == "true"
-    mk = getKodi()
+def sync_watch_status_from_jelly_to_kodi(jelly_item:dict, kodi_item:dict,
+                                         dry_run:Optional[bool]=None) -> tuple[str, dict] | None:
+    """Work out the Kodi write that brings kodi_item's playcount/resume in line with jelly_item.
+
+    Returns the JSON-RPC ``(method, params)`` call to make, or None when the item is
+    already in sync, nothing needs setting, or DRY_RUN is enabled. Callers collect
+    these and send them with ``flush_kodi_writes``; loop callers pass ``dry_run`` so
+    DRY_RUN is read once rather than per item.
+    """
+    if dry_run is None:
+        dry_run = utils.dry_run_enabled()
     resume_position = jelly_item["UserData"]["PlaybackPositionTicks"]
     playcount = jelly_item["UserData"]["PlayCount"]
     resume_position_in_seconds = jelly_util.ticks_to_seconds(resume_position)
     if kodi_item["playcount"] == playcount and abs(kodi_item["resume"]["position"] - resume_position_in_seconds) < 1:
-        logger.debug(f"Watch status for '{kodi_item['title']}' is already in sync. Skipping.")
-        return
+        logger.debug("Watch status for '%s' is already in sync. Skipping.", kodi_item['title'])
+        return None
     if "tvshowid" in kodi_item:
         episode_id = kodi_item["episodeid"]
         if not dry_run:
-            mk.VideoLibrary.SetEpisodeDetails(episodeid=episode_id,
-                playcount=playcount, resume={"position": resume_position_in_seconds})
+            return ("VideoLibrary.SetEpisodeDetails", {"episodeid": episode_id,
+                "playcount": playcount, "resume": {"position": resume_position_in_seconds}})
         else:
-            logger.info(f"Dry-Run enabled: setting episode details for '{kodi_item['title']}'")
+            logger.info("Dry-Run enabled: setting episode details for '%s'", kodi_item['title'])
     elif "movieid" in kodi_item:
         movie_id = kodi_item["movieid"]
         if not dry_run:
@@ -209,22 +311,29 @@ def sync_watch_status_from_jelly_to_kodi(jelly_item:dict, kodi_item:dict):
             logger.debug("sync_watch_status_from_jelly_to_kodi: '%s' Played=%s PlayCount=%s resume_ticks=%s -> resume_secs=%.1f",
                          kodi_item.get("title"), jelly_is_played, playcount,
                          jelly_item["UserData"]["PlaybackPositionTicks"], resume_position_in_seconds)
-            if not jelly_is_played:
-                if resume_position_in_seconds > 0:
-                    mk.VideoLibrary.SetMovieDetails(movieid=movie_id,
-                        playcount=playcount, resume={"position": resume_position_in_seconds})
-                else:
-                    logger.debug("Not updating '%s': Played=False and no resume position — nothing to set.", kodi_item.get("title"))
-            else:
-                mk.VideoLibrary.SetMovieDetails(movieid=movie_id,
-                    playcount=playcount, resume={"position": resume_position_in_seconds})
-                
+            if not jelly_is_played and resume_position_in_seconds <= 0:
+                logger.debug("Not updating '%s': Played=False and no resume position — nothing to set.", kodi_item.get("title"))
+                return None
+            return ("VideoLibrary.SetMovieDetails", {"movieid": movie_id,
+                "playcount": playcount, "resume": {"position": resume_position_in_seconds}})
         else:
-            logger.info(f"Dry-Run enabled: setting movie details for '{kodi_item['title']}'")
+            logger.info("Dry-Run enabled: setting movie details for '%s'", kodi_item['title'])
     else:
         logger.error(f"Unknown item type: {kodi_item}")
+    return None
 
 
+def flush_kodi_writes(batch: list[tuple[str, dict]]) -> int:
+    """Send pending Set*Details calls to Kodi as JSON-RPC batches and clear ``batch``.
+
+    Returns the number of calls Kodi acknowledged.
+    """
+    if not batch:
+        return 0
+    # Writes are independent: log failures and keep going rather than abort the push.
+    results = kodi_rpc_batch(batch, raise_on_error=False)
+    batch.clear()
+    return sum(1 for result in results if result is not None)
 
 
 if __name__ == "__main__":
@@ -8,6 +8,7 @@ from .sync_ops import set_watch_from_jelly_to_kodi, set_watch_from_kodi_to_jelly
 from . import utils
 from pathlib import Path
 from datetime import datetime
+import time
 import typer
 
 
@@ -69,58 +70,48 @@ def sync():
         exit(1)
 
     logger.info(f"Starting sync at {datetime.now()}")
-    start_time = datetime.now()
-    logger.info(f"Starting sync at {start_time}")
 
-    step_start_time = datetime.now()
+    step_start = time.perf_counter_ns()
     logger.info("Step 1/8: get jelly items")
     jelly_pull()
-    step_end_time = datetime.now()
-    logger.info(f"Step 1/8 completed in {step_end_time - step_start_time}")
+    logger.info("Step 1/8 completed in %.3fs", (time.perf_counter_ns() - step_start) / 1e9)
 
-    step_start_time = datetime.now()
+    step_start = time.perf_counter_ns()
     logger.info("Step 2/8: Find jelly watched items")
     jelly_watched = jelly_util.get_watched_items_from_db()
     logger.info(f"Found {len(jelly_watched)} jelly watched items")
-    step_end_time = datetime.now()
-    logger.info(f"Step 2/8 completed in {step_end_time - step_start_time}")
+    logger.info("Step 2/8 completed in %.3fs", (time.perf_counter_ns() - step_start) / 1e9)
 
-    step_start_time = datetime.now()
+    step_start = time.perf_counter_ns()
     logger.info("Step 3/8: Sync jelly watch into kodi")
     set_watch_from_jelly_to_kodi(jelly_watched)
-    step_end_time = datetime.now()
-    logger.info(f"Step 3/8 completed in {step_end_time - step_start_time}")
+    logger.info("Step 3/8 completed in %.3fs", (time.perf_counter_ns() - step_start) / 1e9)
 
-    step_start_time = datetime.now()
+    step_start = time.perf_counter_ns()
     logger.info("Step 4/8: get kodi items")
     kodi_pull()
-    step_end_time = datetime.now()
-    logger.info(f"Step 4/8 completed in {step_end_time - step_start_time}")
+    logger.info("Step 4/8 completed in %.3fs", (time.perf_counter_ns() - step_start) / 1e9)
 
-    step_start_time = datetime.now()
+    step_start = time.perf_counter_ns()
     logger.info("Step 5/8: Find kodi watched items")
     kodi_watched = kodi_util.get_watched_items_from_db()
     logger.info(f"Found {len(kodi_watched)} kodi watched items")
-    step_end_time = datetime.now()
-    logger.info(f"Step 5/8 completed in {step_end_time - step_start_time}")
+    logger.info("Step 5/8 completed in %.3fs", (time.perf_counter_ns() - step_start) / 1e9)
 
     logger.info("Step 6/8: Sync kodi watch into jelly")
-    step_start_time = datetime.now()
+    step_start = time.perf_counter_ns()
     set_watch_from_kodi_to_jelly(kodi_watched)
-    step_end_time = datetime.now()
-    logger.info(f"Step 6/8 completed in {step_end_time - step_start_time}")
+    logger.info("Step 6/8 completed in %.3fs", (time.perf_counter_ns() - step_start) / 1e9)
 
     logger.info("step 7/8 resync jelly items")
-    step_start_time = datetime.now()
+    step_start = time.perf_counter_ns()
     jelly_pull()
-    step_end_time = datetime.now()
-    logger.info(f"Step 7/8 completed in {step_end_time - step_start_time}")
+    logger.info("Step 7/8 completed in %.3fs", (time.perf_counter_ns() - step_start) / 1e9)
 
     logger.info("step 8/8 resync kodi items")
-    step_start_time = datetime.now()
+    step_start = time.perf_counter_ns()
     kodi_pull()
-    step_end_time = datetime.now()
-    logger.info(f"Step 8/8 completed in {step_end_time - step_start_time}")
+    logger.info("Step 8/8 completed in %.3fs", (time.perf_counter_ns() - step_start) / 1e9)
 
     logger.info("Done")
 
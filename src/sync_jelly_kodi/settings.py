@@ -0,0 +1,51 @@
+"""Environment-derived settings read by the per-item and per-query code paths.
+
+``get_settings()`` reads the environment once and caches the result, so hot loops
+(and every ``get_sqlite_connection()`` call) don't go back to ``os.getenv``.
+``utils.load_dotenvs()`` clears the cache, so values from ``.env`` / ``.credentials``
+are picked up even though modules are imported before the dotenv files are loaded.
+"""
+import os
+from dataclasses import dataclass, field
+
+from cachetools import cached, LRUCache
+
+
+@dataclass(frozen=True)
+class Settings:
+    sqlite_db_path: str
+    sqlite_batch: int
+    fast_insert: bool
+    dry_run: bool
+    jelly_mount_pat: str
+    kodi_mount_pat: str
+    jellyfin_max_workers: int
+    kodi_max_workers: int
+    kodi_rpc_batch: int
+    kodi_host: str
+    kodi_port: int
+    kodi_user: str
+    kodi_pass: str = field(repr=False)
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            sqlite_db_path=os.getenv("SQLITE_DB_PATH", "./data/jellykodi.db"),
+            sqlite_batch=max(1, int(os.getenv("SQLITE_BATCH", "1000"))),
+            fast_insert=os.getenv("FAST_INSERT", "0") == "1",
+            dry_run=os.getenv("DRY_RUN", "false") == "true",
+            jelly_mount_pat=os.getenv("JELLY_MOUNT_PAT", ""),
+            kodi_mount_pat=os.getenv("KODI_MOUNT_PAT", ""),
+            jellyfin_max_workers=max(1, int(os.getenv("JELLYFIN_MAX_WORKERS", "4"))),
+            kodi_max_workers=max(1, int(os.getenv("KODI_MAX_WORKERS", "8"))),
+            kodi_rpc_batch=max(1, int(os.getenv("KODI_RPC_BATCH", "100"))),
+            kodi_host=os.getenv("KODIHOST", "localhost"),
+            kodi_port=int(os.getenv("KODIPORT", "8080")),
+            kodi_user=os.getenv("KODIUSER", "kodi"),
+            kodi_pass=os.getenv("KODIPASS", "1234"),
+        )
+
+
+@cached(LRUCache(maxsize=1))
+def get_settings() -> Settings:
+    return Settings.from_env()
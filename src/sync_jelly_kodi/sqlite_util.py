@@ -2,27 +2,39 @@ import sqlite3
 import json
 import logging
 import os
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 import threading
+from contextlib import contextmanager
+
+from .settings import get_settings
 
 logger = logging.getLogger(__name__)
 
 
 class SQLiteDatabase:
     """
-    Thread-safe SQLite connection manager with connection pooling
+    Thread-safe SQLite connection manager with connection pooling.
+    One instance per database path, so a changed SQLITE_DB_PATH gets its own connections.
     """
-    _instance = None
+    _instances: Dict[str, "SQLiteDatabase"] = {}
     _lock = threading.Lock()
 
     def __new__(cls, db_path: str):
+        instance = cls._instances.get(db_path)
+        if instance is not None:
+            return instance
         with cls._lock:
-            if cls._instance is None:
-                cls._instance = super().__new__(cls)
-                cls._instance._db_path = db_path
-                cls._instance._local = threading.local()
-            return cls._instance
+            instance = cls._instances.get(db_path)
+            if instance is None:
+                Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+                instance = super().__new__(cls)
+                instance._db_path = db_path
+                instance._local = threading.local()
+                instance._schema_ready = False
+                cls._instances[db_path] = instance
+            return instance
 
     def get_connection(self) -> sqlite3.Connection:
         """Get thread-local connection"""
@@ -39,8 +51,21 @@ class SQLiteDatabase:
             self._local.connection.execute("PRAGMA journal_mode = WAL")
             self._local.connection.execute("PRAGMA synchronous = NORMAL")
             self._local.connection.execute("PRAGMA cache_size = -10000")  # 10MB cache
+            # Stale-delete staging tables (current_*_ids) live in memory, and reads of
+            # the main db go through a memory map instead of read() syscalls.
+            self._local.connection.execute("PRAGMA temp_store = MEMORY")
+            self._local.connection.execute("PRAGMA mmap_size = 268435456")  # 256MB
         return self._local.connection
 
+    def ensure_schema(self, conn: sqlite3.Connection):
+        """Create tables/indexes once per database rather than on every connection fetch."""
+        if self._schema_ready:
+            return
+        with self._lock:
+            if not self._schema_ready:
+                initialize_schema(conn)
+                self._schema_ready = True
+
     def close(self):
         """Close thread-local connection"""
         if hasattr(self._local, 'connection') and self._local.connection:
@@ -52,13 +77,9 @@ def get_sqlite_connection() -> sqlite3.Connection:
     """
     Get SQLite connection using configuration from environment variables
     """
-    db_path = os.getenv("SQLITE_DB_PATH", "./data/jellykodi.db")
-    db_dir = Path(db_path).parent
-    db_dir.mkdir(parents=True, exist_ok=True)
-
-    db = SQLiteDatabase(db_path)
+    db = SQLiteDatabase(get_settings().sqlite_db_path)
     conn = db.get_connection()
-    initialize_schema(conn)
+    db.ensure_schema(conn)
     return conn
 
 
@@ -94,6 +115,15 @@ def initialize_schema(conn: sqlite3.Connection):
         )
     """)
 
+    # When each source was last pulled. Unchanged rows are not rewritten on a pull,
+    # so MAX(last_updated) alone would under-report freshness.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS pull_log (
+            source TEXT NOT NULL PRIMARY KEY,
+            pulled_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
     # Audit log: one row per step of a rename/archive/sync operation. Steps sharing
     # an op_id belong to one operation; step_index orders them. This is the durable
     # record behind the Audit Log tab and post-hoc troubleshooting.
@@ -116,6 +146,10 @@ def initialize_schema(conn: sqlite3.Connection):
     indexes = [
         ("idx_jelly_unified_file", "CREATE INDEX IF NOT EXISTS idx_jelly_unified_file ON jellyitems(unified_file)"),
         ("idx_jelly_user_name", "CREATE INDEX IF NOT EXISTS idx_jelly_user_name ON jellyitems(user_name)"),
+        # Partial index covering exactly the rows get_watched_jelly_items selects.
+        ("idx_jelly_watched", """CREATE INDEX IF NOT EXISTS idx_jelly_watched ON jellyitems(user_name)
+            WHERE json_extract(userdata_json, '$.PlayCount') > 0
+               OR json_extract(userdata_json, '$.PlaybackPositionTicks') > 0"""),
         ("idx_kodi_unified_file", "CREATE INDEX IF NOT EXISTS idx_kodi_unified_file ON kodiitems(unified_file)"),
         ("idx_kodi_playcount", "CREATE INDEX IF NOT EXISTS idx_kodi_playcount ON kodiitems(playcount)"),
         ("idx_kodi_resume_position", "CREATE INDEX IF NOT EXISTS idx_kodi_resume_position ON kodiitems(resume_position)"),
@@ -129,9 +163,91 @@ def initialize_schema(conn: sqlite3.Connection):
         except sqlite3.OperationalError:
             pass  # Index might exist
 
+    # Refresh planner statistics so the unified_file / watched indexes are chosen
+    # for the push lookups; cheap no-op when the stats are already current.
+    conn.execute("PRAGMA optimize")
     conn.commit()
 
 
+def _batch_size() -> int:
+    """Rows written per ``executemany`` call during bulk upserts."""
+    return get_settings().sqlite_batch
+
+
+def _batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Yield successive lists of at most ``size`` elements from ``items``."""
+    it = iter(items)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+@contextmanager
+def _bulk_write(conn: sqlite3.Connection):
+    """With FAST_INSERT=1, skip fsyncs for the duration of a bulk upsert.
+
+    The tables are a cache rebuilt by every pull, so a write lost to a power cut is
+    repaired by the next pull; the connection goes back to synchronous=NORMAL after.
+    """
+    fast = get_settings().fast_insert
+    if fast:
+        conn.execute("PRAGMA synchronous = OFF")
+    try:
+        yield
+    finally:
+        if fast:
+            conn.execute("PRAGMA synchronous = NORMAL")
+
+
+def _count_rows(cursor: sqlite3.Cursor, table_name: str) -> int:
+    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+    return cursor.fetchone()[0]
+
+
+# Upsert statements are built once; rows only skip the UPDATE when the stored JSON is identical.
+_UPSERT_JELLY_SQL = """INSERT INTO jellyitems
+    (id, user_id, user_name, unified_root, unified_file, userdata_json, item_json)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(id, user_id) DO UPDATE
+    SET user_name = excluded.user_name, unified_root = excluded.unified_root,
+        unified_file = excluded.unified_file, userdata_json = excluded.userdata_json,
+        item_json = excluded.item_json, last_updated = CURRENT_TIMESTAMP
+    WHERE jellyitems.item_json IS NOT excluded.item_json
+       OR jellyitems.userdata_json IS NOT excluded.userdata_json"""
+
+_UPSERT_KODI_SQL = """INSERT INTO kodiitems
+    (uniqueid, unified_root, unified_file, playcount, resume_position, item_json)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(uniqueid) DO UPDATE
+    SET unified_root = excluded.unified_root, unified_file = excluded.unified_file,
+        playcount = excluded.playcount, resume_position = excluded.resume_position,
+        item_json = excluded.item_json, last_updated = CURRENT_TIMESTAMP
+    WHERE kodiitems.item_json IS NOT excluded.item_json"""
+
+
+def _jelly_row(item: Dict[str, Any]) -> tuple:
+    get = item.get
+    return (
+        get("Id"), get("UserId"), get("UserName"), get("unified_root"), get("unified_file"),
+        json.dumps(get("UserData", {})), json.dumps(item),
+    )
+
+
+def _kodi_row(item: Dict[str, Any]) -> tuple:
+    get = item.get
+    return (
+        get("uniqueid"), get("unified_root"), get("unified_file"), get("playcount", 0),
+        get("resume", {}).get("position", 0.0), json.dumps(item),
+    )
+
+
+def _record_pull(cursor: sqlite3.Cursor, source: str):
+    cursor.execute(
+        """INSERT INTO pull_log (source) VALUES (?)
+           ON CONFLICT(source) DO UPDATE SET pulled_at = CURRENT_TIMESTAMP""",
+        (source,),
+    )
+
+
 def upsert_jelly_items(items: List[Dict[str, Any]]) -> Tuple[int, int, int]:
     """
     Upsert Jellyfin items into SQLite.
@@ -139,50 +255,19 @@ def upsert_jelly_items(items: List[Dict[str, Any]]) -> Tuple[int, int, int]:
     """
     conn = get_sqlite_connection()
     cursor = conn.cursor()
-
-    matched_count = 0
-    inserted_count = 0
-    modified_count = 0
-
-    for item in items:
-        id_val = item.get("Id")
-        user_id = item.get("UserId")
-        user_name = item.get("UserName")
-        unified_root = item.get("unified_root")
-        unified_file = item.get("unified_file")
-        userdata = item.get("UserData", {})
-        item_json = json.dumps(item)
-        userdata_json = json.dumps(userdata)
-
-        # Check if exists
-        cursor.execute(
-            "SELECT last_updated FROM jellyitems WHERE id = ? AND user_id = ?",
-            (id_val, user_id)
-        )
-        existing = cursor.fetchone()
-
-        if existing:
-            matched_count += 1
-            # Update if item changed
-            cursor.execute(
-                """UPDATE jellyitems
-                   SET user_name = ?, unified_root = ?, unified_file = ?,
-                       userdata_json = ?, item_json = ?, last_updated = CURRENT_TIMESTAMP
-                   WHERE id = ? AND user_id = ?""",
-                (user_name, unified_root, unified_file, userdata_json, item_json, id_val, user_id)
-            )
-            if cursor.rowcount > 0:
-                modified_count += 1
-        else:
-            inserted_count += 1
-            cursor.execute(
-                """INSERT INTO jellyitems
-                   (id, user_id, user_name, unified_root, unified_file, userdata_json, item_json)
-                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (id_val, user_id, user_name, unified_root, unified_file, userdata_json, item_json)
-            )
-
-    conn.commit()
+    with _bulk_write(conn):
+        rows_before = _count_rows(cursor, "jellyitems")
+        changes_before = conn.total_changes
+
+        for batch in _batches(items, _batch_size()):
+            cursor.executemany(_UPSERT_JELLY_SQL, map(_jelly_row, batch))
+
+        inserted_count = _count_rows(cursor, "jellyitems") - rows_before
+        # Rows whose content is unchanged are skipped by the upsert's WHERE clause.
+        modified_count = conn.total_changes - changes_before - inserted_count
+        _record_pull(cursor, "jelly")
+        conn.commit()
+    matched_count = len(items) - inserted_count
     return (matched_count, inserted_count, modified_count)
 
 
@@ -193,49 +278,19 @@ def upsert_kodi_items(items: List[Dict[str, Any]]) -> Tuple[int, int, int]:
     """
     conn = get_sqlite_connection()
     cursor = conn.cursor()
-
-    matched_count = 0
-    inserted_count = 0
-    modified_count = 0
-
-    for item in items:
-        uniqueid = item.get("uniqueid")
-        unified_root = item.get("unified_root")
-        unified_file = item.get("unified_file")
-        playcount = item.get("playcount", 0)
-        resume_data = item.get("resume", {})
-        resume_position = resume_data.get("position", 0.0)
-        item_json = json.dumps(item)
-
-        # Check if exists
-        cursor.execute(
-            "SELECT last_updated FROM kodiitems WHERE uniqueid = ?",
-            (uniqueid,)
-        )
-        existing = cursor.fetchone()
-
-        if existing:
-            matched_count += 1
-            # Update if item changed
-            cursor.execute(
-                """UPDATE kodiitems
-                   SET unified_root = ?, unified_file = ?, playcount = ?,
-                       resume_position = ?, item_json = ?, last_updated = CURRENT_TIMESTAMP
-                   WHERE uniqueid = ?""",
-                (unified_root, unified_file, playcount, resume_position, item_json, uniqueid)
-            )
-            if cursor.rowcount > 0:
-                modified_count += 1
-        else:
-            inserted_count += 1
-            cursor.execute(
-                """INSERT INTO kodiitems
-                   (uniqueid, unified_root, unified_file, playcount, resume_position, item_json)
-                   VALUES (?, ?, ?, ?, ?, ?)""",
-                (uniqueid, unified_root, unified_file, playcount, resume_position, item_json)
-            )
-
-    conn.commit()
+    with _bulk_write(conn):
+        rows_before = _count_rows(cursor, "kodiitems")
+        changes_before = conn.total_changes
+
+        for batch in _batches(items, _batch_size()):
+            cursor.executemany(_UPSERT_KODI_SQL, map(_kodi_row, batch))
+
+        inserted_count = _count_rows(cursor, "kodiitems") - rows_before
+        # Rows whose content is unchanged are skipped by the upsert's WHERE clause.
+        modified_count = conn.total_changes - changes_before - inserted_count
+        _record_pull(cursor, "kodi")
+        conn.commit()
+    matched_count = len(items) - inserted_count
     return (matched_count, inserted_count, modified_count)
 
 
@@ -319,6 +374,11 @@ def delete_jelly_items_by_file(unified_file: str) -> int:
     return cursor.rowcount
 
 
+_INSERT_AUDIT_SQL = """INSERT INTO audit_log
+    (op_id, action, target, step_index, step_label, ok, detail, current_state)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)"""
+
+
 def log_audit_step(
     op_id: str,
     action: str,
@@ -332,9 +392,7 @@ def log_audit_step(
     """Append a single operation-step to the audit log."""
     conn = get_sqlite_connection()
     conn.execute(
-        """INSERT INTO audit_log
-           (op_id, action, target, step_index, step_label, ok, detail, current_state)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+        _INSERT_AUDIT_SQL,
         (op_id, action, target, step_index, step_label, 1 if ok else 0, detail, current_state),
     )
     conn.commit()
@@ -343,19 +401,19 @@ def log_audit_step(
 def log_audit_steps(op_id: str, action: str, target: Optional[str], steps: List[Dict[str, Any]]) -> None:
     """Append a whole list of step dicts (``{label, ok, detail, current_state}``) at once."""
     conn = get_sqlite_connection()
-    for i, s in enumerate(steps):
-        conn.execute(
-            """INSERT INTO audit_log
-               (op_id, action, target, step_index, step_label, ok, detail, current_state)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+    conn.executemany(
+        _INSERT_AUDIT_SQL,
+        (
             (
                 op_id, action, target, i,
                 s.get("label", ""),
                 1 if s.get("ok") else 0,
                 s.get("detail", ""),
                 s.get("current_state", ""),
-            ),
-        )
+            )
+            for i, s in enumerate(steps)
+        ),
+    )
     conn.commit()
 
 
@@ -411,17 +469,23 @@ def get_audit_operations(limit: int = 50) -> List[Dict[str, Any]]:
 
 
 def get_last_pull_times() -> Dict[str, Optional[str]]:
-    """Return the most recent ``last_updated`` per source table.
+    """Return the most recent pull time per source.
 
-    Used by the sync UI to show data staleness ("Kodi last pulled: ..."). Values are
-    SQLite ``CURRENT_TIMESTAMP`` strings (UTC), or ``None`` if the table is empty.
+    Used by the sync UI to show data staleness ("Kodi last pulled: ..."). Reads
+    ``pull_log``, falling back to the table's ``MAX(last_updated)`` for databases
+    populated before it existed. Values are SQLite ``CURRENT_TIMESTAMP`` strings
+    (UTC), or ``None`` if the source has never been pulled.
     """
     conn = get_sqlite_connection()
     cursor = conn.cursor()
     out: Dict[str, Optional[str]] = {}
     for label, table in (("jelly", "jellyitems"), ("kodi", "kodiitems")):
         try:
-            cursor.execute(f"SELECT MAX(last_updated) FROM {table}")
+            cursor.execute(
+                f"""SELECT COALESCE((SELECT pulled_at FROM pull_log WHERE source = ?),
+                                    (SELECT MAX(last_updated) FROM {table}))""",
+                (label,),
+            )
             row = cursor.fetchone()
             out[label] = row[0] if row else None
         except sqlite3.OperationalError:
@@ -459,6 +523,72 @@ def find_jelly_items_by_file(file_path: str) -> List[Dict[str, Any]]:
     return [json.loads(row[0]) for row in cursor.fetchall()]
 
 
+# Only the fields the watch-status sync reads, pulled from columns / json_extract so
+# the full item_json doesn't have to be decoded for every match.
+_KODI_SYNC_COLUMNS = """kodiitems.unified_file, playcount, resume_position,
+    json_extract(item_json, '$.title'), json_extract(item_json, '$.movieid'),
+    json_extract(item_json, '$.episodeid'), json_extract(item_json, '$.tvshowid')"""
+
+_JELLY_SYNC_COLUMNS = """jellyitems.unified_file, id, user_id, json_extract(item_json, '$.Name'), userdata_json"""
+
+
+def _kodi_sync_item(row) -> Dict[str, Any]:
+    _, playcount, resume_position, title, movieid, episodeid, tvshowid = row
+    item = {"playcount": playcount, "resume": {"position": resume_position}, "title": title}
+    for key, value in (("movieid", movieid), ("episodeid", episodeid), ("tvshowid", tvshowid)):
+        if value is not None:
+            item[key] = value
+    return item
+
+
+def _jelly_sync_item(row) -> Dict[str, Any]:
+    _, item_id, user_id, name, userdata_json = row
+    return {"Id": item_id, "UserId": user_id, "Name": name, "UserData": json.loads(userdata_json)}
+
+
+def _find_items_by_files(table_name: str, columns: str, to_item, file_paths: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+    conn = get_sqlite_connection()
+    cursor = conn.cursor()
+
+    # Stage the wanted paths and join once, like the stale deletes, so the match is a
+    # single indexed join with no per-item query and no bound-variable limit. CROSS
+    # JOIN keeps wanted_files as the outer loop, probing the unified_file index.
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS wanted_files (unified_file TEXT PRIMARY KEY)")
+    cursor.execute("DELETE FROM wanted_files")
+    cursor.executemany(
+        "INSERT OR IGNORE INTO wanted_files (unified_file) VALUES (?)",
+        ((f,) for f in file_paths if f),
+    )
+    cursor.execute(
+        f"""SELECT {columns} FROM wanted_files w
+            CROSS JOIN {table_name} ON {table_name}.unified_file = w.unified_file"""
+    )
+    by_file: Dict[str, List[Dict[str, Any]]] = {}
+    for row in cursor.fetchall():
+        by_file.setdefault(row[0], []).append(to_item(row))
+    cursor.execute("DELETE FROM wanted_files")
+    conn.commit()
+    return by_file
+
+
+def find_kodi_items_by_files(file_paths: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Find Kodi items for many unified_file paths at once, grouped by unified_file.
+    Files with no match are absent from the result. Items carry only the fields
+    the watch-status sync uses (playcount, resume, title, movie/episode/tvshow ids).
+    """
+    return _find_items_by_files("kodiitems", _KODI_SYNC_COLUMNS, _kodi_sync_item, file_paths)
+
+
+def find_jelly_items_by_files(file_paths: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Find Jellyfin items for many unified_file paths at once, grouped by unified_file.
+    Files with no match are absent from the result. Items carry only the fields
+    the watch-status sync uses (Id, UserId, Name, UserData).
+    """
+    return _find_items_by_files("jellyitems", _JELLY_SYNC_COLUMNS, _jelly_sync_item, file_paths)
+
+
 def get_transcoded_movie_items() -> List[Dict[str, Any]]:
     """
     Get Jellyfin items that are Movies living under the TRANSCODED root.
@@ -498,48 +628,62 @@ def get_all_kodi_item_ids() -> List[str]:
     return [row[0] for row in cursor.fetchall()]
 
 
-def delete_stale_jelly_items(existing_ids: List[Tuple[str, str]]) -> int:
+def delete_stale_jelly_items(existing_ids: Iterable[Tuple[str, str]]) -> int:
     """
-    Delete Jellyfin items that are not in the provided list of (id, user_id) pairs
+    Delete Jellyfin items that are not in the provided collection of (id, user_id) pairs
     """
     conn = get_sqlite_connection()
     cursor = conn.cursor()
 
-    if not existing_ids:
-        # Delete all if empty list
-        cursor.execute("DELETE FROM jellyitems")
-    else:
-        # Build IN clause with placeholders
-        placeholders = ','.join(['(?,?)'] * len(existing_ids))
-        flat_ids = [item for pair in existing_ids for item in pair]
-        cursor.execute(
-            f"DELETE FROM jellyitems WHERE (id, user_id) NOT IN ({placeholders})",
-            flat_ids
+    # Stage the live keys in a temp table and anti-join against it, rather than
+    # binding one placeholder per key (which overflows SQLite's variable limit on
+    # large libraries). An empty list deletes everything, as before.
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS current_jelly_ids (
+            id TEXT NOT NULL,
+            user_id TEXT NOT NULL,
+            PRIMARY KEY (id, user_id)
+        )
+    """)
+    cursor.execute("DELETE FROM current_jelly_ids")
+    cursor.executemany("INSERT OR IGNORE INTO current_jelly_ids (id, user_id) VALUES (?, ?)", existing_ids)
+    cursor.execute("""
+        DELETE FROM jellyitems
+        WHERE NOT EXISTS (
+            SELECT 1 FROM current_jelly_ids c
+            WHERE c.id = jellyitems.id AND c.user_id = jellyitems.user_id
         )
+    """)
 
     deleted_count = cursor.rowcount
+    cursor.execute("DELETE FROM current_jelly_ids")
     conn.commit()
     return deleted_count
 
 
-def delete_stale_kodi_items(existing_ids: List[str]) -> int:
+def delete_stale_kodi_items(existing_ids: Iterable[str]) -> int:
     """
-    Delete Kodi items that are not in the provided list of uniqueid values
+    Delete Kodi items that are not in the provided collection of uniqueid values
     """
     conn = get_sqlite_connection()
     cursor = conn.cursor()
 
-    if not existing_ids:
-        # Delete all if empty list
-        cursor.execute("DELETE FROM kodiitems")
-    else:
-        placeholders = ','.join(['?'] * len(existing_ids))
-        cursor.execute(
-            f"DELETE FROM kodiitems WHERE uniqueid NOT IN ({placeholders})",
-            existing_ids
+    # Same temp-table anti-join as delete_stale_jelly_items.
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS current_kodi_ids (uniqueid TEXT NOT NULL PRIMARY KEY)")
+    cursor.execute("DELETE FROM current_kodi_ids")
+    cursor.executemany(
+        "INSERT OR IGNORE INTO current_kodi_ids (uniqueid) VALUES (?)",
+        ((uniqueid,) for uniqueid in existing_ids),
+    )
+    cursor.execute("""
+        DELETE FROM kodiitems
+        WHERE NOT EXISTS (
+            SELECT 1 FROM current_kodi_ids c WHERE c.uniqueid = kodiitems.uniqueid
         )
+    """)
 
     deleted_count = cursor.rowcount
+    cursor.execute("DELETE FROM current_kodi_ids")
     conn.commit()
     return deleted_count
 
@@ -561,9 +705,17 @@ def delete_all_items(table_name: str = "jellyitems") -> int:
     return deleted_count
 
 
-def get_all_items(table_name: str = "jellyitems") -> List[Dict[str, Any]]:
+def _iter_item_rows(cursor: sqlite3.Cursor) -> Iterator[Dict[str, Any]]:
+    while rows := cursor.fetchmany():
+        for row in rows:
+            yield json.loads(row[0])
+
+
+def get_all_items(table_name: str = "jellyitems", stream: bool = False):
     """
-    Read all items from specified table
+    Read all items from specified table.
+    With ``stream=True`` return a generator that decodes rows ``_batch_size()`` at a
+    time instead of building the whole table as a list.
     """
     conn = get_sqlite_connection()
     cursor = conn.cursor()
@@ -573,6 +725,9 @@ def get_all_items(table_name: str = "jellyitems") -> List[Dict[str, Any]]:
         raise ValueError(f"Invalid table name: {table_name}")
 
     cursor.execute(f"SELECT item_json FROM {table_name}")
+    if stream:
+        cursor.arraysize = _batch_size()
+        return _iter_item_rows(cursor)
     return [json.loads(row[0]) for row in cursor.fetchall()]
 
 
@@ -11,37 +11,60 @@ request that only fires after the previous one succeeds.
 """
 import logging
 import os
+from collections import defaultdict
 
 from . import jelly_util, kodi_util
 from .jelly_util import (
-    JellySession, jelly_pull, jelly_library_refresh, mark_library_played,
+    get_jelly_session, jelly_pull, jelly_library_refresh, mark_library_played,
 )
 from .kodi_util import getKodi, kodi_clean, kodi_pull, kodi_library_scan
-from .sqlite_util import find_jelly_items_by_file, find_kodi_items_by_file
+from .sqlite_util import find_jelly_items_by_files, find_kodi_items_by_files
+from .utils import dry_run_enabled
 
 logger = logging.getLogger(__name__)
 
 
+def _group_by_file(items: list[dict]) -> dict[str, list[dict]]:
+    """Group watched items by ``unified_file`` so each distinct file is matched and synced once.
+
+    The same file shows up once per Jellyfin user (or per duplicate Kodi entry). Writing
+    it once per entry only let the last one win, so callers sync from ``group[-1]``.
+    """
+    groups: dict[str, list[dict]] = defaultdict(list)
+    for item in items:
+        groups[item.get("unified_file")].append(item)
+    return groups
+
+
 def set_watch_from_jelly_to_kodi(jelly_watched_items: list[dict]) -> tuple[int, int]:
     """Push each watched Jellyfin item's status onto its matching Kodi item.
 
     Returns ``(matched, total)`` -- how many Jellyfin items had a Kodi match.
     """
     found_counter = 0
-    for item in jelly_watched_items:
-        file_location = item["unified_file"]
-        found_items = find_kodi_items_by_file(file_location)
+    # Kodi writes are queued and sent together at the end: flush_kodi_writes packs
+    # them into JSON-RPC batches and posts those batches concurrently.
+    pending: list[tuple[str, dict]] = []
+    dry_run = dry_run_enabled()
+    groups = _group_by_file(jelly_watched_items)
+    # One staged join for all watched files instead of a query per item.
+    kodi_by_file = find_kodi_items_by_files(groups)
+    for file_location, items in groups.items():
+        found_items = kodi_by_file.get(file_location, [])
         if len(found_items) > 1:
             logger.warning("More than one match")
-            found_counter += 1
+            found_counter += len(items)
             for found_item in found_items:
-                logger.debug(f"Found: {file_location}")
+                logger.debug("Found: %s", file_location)
         elif len(found_items) == 1:
-            logger.debug(f"Found: {file_location}")
-            found_counter += 1
-            kodi_util.sync_watch_status_from_jelly_to_kodi(item, found_items[0])
+            logger.debug("Found: %s", file_location)
+            found_counter += len(items)
+            call = kodi_util.sync_watch_status_from_jelly_to_kodi(items[-1], found_items[0], dry_run)
+            if call:
+                pending.append(call)
         else:
-            logger.debug(f"No match found: {file_location}")
+            logger.debug("No match found: %s", file_location)
+    kodi_util.flush_kodi_writes(pending)
     logger.info(
         f"Found {found_counter} Kodi items out of {len(jelly_watched_items)} JellyFin items in kodi"
     )
@@ -53,34 +76,36 @@ def set_watch_from_kodi_to_jelly(kodi_watched_items: list[dict]) -> tuple[int, i
 
     Returns ``(matched, total)`` -- how many Jellyfin item rows were updated.
     """
-    jellyfin_url = os.getenv("JELLYFIN_URL")
-    api_key = os.getenv("JELLYFIN_API_KEY")
-    if not jellyfin_url or not api_key:
-        raise ValueError(
-            "JELLYFIN_URL and JELLYFIN_API_KEY must be set in environment variables."
+    session = get_jelly_session()
+    dry_run = dry_run_enabled()
+    groups = _group_by_file(kodi_watched_items)
+    missing = groups.pop(None, []) + groups.pop("", [])
+    for item in missing:
+        logger.warning(
+            "Kodi item '%s' is missing 'unified_file', skipping.", item.get('title')
         )
-    session = JellySession(jellyfin_url, api_key)
+    # One staged join for all watched files instead of a query per item.
+    jelly_by_file = find_jelly_items_by_files(groups)
     found_counter = 0
-    for item in kodi_watched_items:
-        file_location = item.get("unified_file")
-        if not file_location:
-            logger.warning(
-                f"Kodi item '{item.get('title')}' is missing 'unified_file', skipping."
-            )
-            continue
-
-        found_items = find_jelly_items_by_file(file_location)
+    # Jellyfin writes are queued and sent together at the end, concurrently.
+    pending: list[tuple] = []
+    for file_location, items in groups.items():
+        found_items = jelly_by_file.get(file_location, [])
 
         if found_items:
             logger.debug(
-                f"Found {len(found_items)} match(es) in Jellyfin for Kodi item: {file_location}"
+                "Found %d match(es) in Jellyfin for Kodi item: %s", len(found_items), file_location
             )
-            found_counter += len(found_items)
+            found_counter += len(found_items) * len(items)
             # A single Kodi item can match multiple Jellyfin users' libraries. Sync all.
             for found_item in found_items:
-                jelly_util.sync_watch_status_from_kodi_to_jelly(item, found_item, session)
+                update = jelly_util.sync_watch_status_from_kodi_to_jelly(items[-1], found_item, dry_run)
+                if update:
+                    pending.append(update)
         else:
-            logger.debug(f"No Jellyfin match found for Kodi item: {file_location}")
+            logger.debug("No Jellyfin match found for Kodi item: %s", file_location)
+
+    jelly_util.flush_jelly_writes(session, pending)
 
     logger.info(
         f"Found {found_counter} Jellyfin items out of {len(kodi_watched_items)} Kodi items in JellyFin."
@@ -182,7 +207,7 @@ def push_kodi_to_jelly_step() -> tuple[bool, str]:
 
 # Ordered auto-sync sequence. Both sides are pulled up front (steps 2-3) so the
 # kodiitems and jellyitems tables are fresh BEFORE any push — the pushes match items
-# by reading these tables (set_watch_from_*_to_* -> find_*_items_by_file), so a stale
+# by reading these tables (set_watch_from_*_to_* -> find_*_items_by_files), so a stale
 # or never-pulled Kodi table would otherwise cause Push Jellyfin -> Kodi to match
 # nothing. The final re-pulls refresh the DB to reflect the post-push state.
 AUTO_STEPS: list[tuple[str, callable]] = [
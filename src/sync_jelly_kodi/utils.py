@@ -1,21 +1,48 @@
 from pathlib import Path
+import json
 import logging
 import os
+import re
 
+from cachetools import cached, LRUCache
 from dotenv import load_dotenv
 
+from .settings import get_settings
+
+try:
+    import orjson
+except ImportError:  # optional: `pip install orjson` for faster decoding of large responses
+    orjson = None
+
 class RelativePathFormatter(logging.Formatter):
     """A formatter that uses a relative path for the log source."""
-    def format(self, record):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         # Assuming utils.py is in the project root directory.
-        project_root = os.path.dirname(os.path.abspath(__file__))
-        record.relativepath = os.path.relpath(record.pathname, project_root)
+        self._project_root = os.path.dirname(os.path.abspath(__file__))
+        # Records come from a handful of source files; compute each relpath once.
+        self._relpath_cache: dict[str, str] = {}
+
+    def format(self, record):
+        relativepath = self._relpath_cache.get(record.pathname)
+        if relativepath is None:
+            relativepath = os.path.relpath(record.pathname, self._project_root)
+            self._relpath_cache[record.pathname] = relativepath
+        record.relativepath = relativepath
         return super().format(record)
 
 
+# Log file the root logger is currently configured for; main and web both call
+# config_logger when `sync_jelly_kodi web` imports the web module.
+_configured_log_path: Path | None = None
+
+
 def config_logger(log_file_name:str, log_file_dir:Path):
-    log_file_dir.mkdir(parents=True,exist_ok=True)
+    global _configured_log_path
     log_file_path = log_file_dir / log_file_name
+    if _configured_log_path == log_file_path:
+        return
+    log_file_dir.mkdir(parents=True,exist_ok=True)
     print(f"Log file path: {log_file_path}")
 
     # Get the root logger
@@ -23,6 +50,8 @@ def config_logger(log_file_name:str, log_file_dir:Path):
 
     # Clear existing handlers to avoid duplicate logs
     if root_logger.hasHandlers():
+        for handler in root_logger.handlers:
+            handler.close()
         root_logger.handlers.clear()
 
     # Configure root logger
@@ -36,7 +65,7 @@ def config_logger(log_file_name:str, log_file_dir:Path):
     formatter = RelativePathFormatter("%(asctime)s %(levelname)s [%(name)s] [%(relativepath)s:%(funcName)s():%(lineno)d] %(message)s")
 
     # Add file handler
-    file_handler = logging.FileHandler(log_file_path)
+    file_handler = logging.FileHandler(log_file_path, delay=True)  # opened on first record
     file_handler.setFormatter(formatter)
     root_logger.addHandler(file_handler)
 
@@ -44,15 +73,39 @@ def config_logger(log_file_name:str, log_file_dir:Path):
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
     root_logger.addHandler(console_handler)
+    _configured_log_path = log_file_path
 
 def load_dotenvs():
     load_dotenv()
     load_dotenv(".credentials")
+    get_settings.cache_clear()  # re-read settings with the dotenv values applied
     
+def dry_run_enabled()->bool:
+    """True when DRY_RUN=true: log intended Jellyfin/Kodi writes without making them."""
+    return get_settings().dry_run
+
+
 def convert_windows_to_unix_path(path:str)->str:
     return path.replace("\\","/")
 
 
+def json_loads(data: bytes | str):
+    """Decode JSON with orjson when it is installed, otherwise the stdlib ``json``."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@cached(LRUCache(maxsize=4))
+def compile_mount_pattern(pattern:str)->re.Pattern:
+    """Compile a JELLY_MOUNT_PAT / KODI_MOUNT_PAT regex once per distinct pattern.
+
+    Keyed on the pattern string rather than read at import time, so values loaded
+    later by ``load_dotenvs()`` are still picked up.
+    """
+    return re.compile(pattern)
+
+
 if __name__ == "__main__":
     print("before",os.getenv("KODIUSER"))
     load_dotenvs()